@@ -1,22 +1,36 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
 
+_TRUE = frozenset({"1", "true", "yes", "y", "on"})
+_FALSE = frozenset({"0", "false", "no", "n", "off"})
+_BOOL_VALUES = {**dict.fromkeys(_TRUE, True), **dict.fromkeys(_FALSE, False)}
+
+
 def _getenv_bool(name: str, default: bool) -> bool:
     raw = os.getenv(name)
     if raw is None:
         return default
-    raw = raw.strip().lower()
-    if raw in {"1", "true", "yes", "y", "on"}:
-        return True
-    if raw in {"0", "false", "no", "n", "off"}:
-        return False
-    return default
+    return _BOOL_VALUES.get(raw.strip().casefold(), default)
+
+
+def _getenv_int(name: str, default: int) -> int:
+    # Non-negative integers only; anything else falls back to the default.
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    raw = raw.strip()
+    if not (raw.isascii() and raw.isdigit()):
+        return default
+    return int(raw)
+
+
+_cached_config: ImapConfig | None = None
 
 
 @dataclass(frozen=True)
@@ -28,29 +42,44 @@ class ImapConfig:
     ssl: bool = True
     starttls: bool = False
     timeout_seconds: int = 30
+    # Derived: STARTTLS only applies to plain (non-SSL) connections.
+    use_starttls: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "use_starttls", (not self.ssl) and self.starttls)
 
     @classmethod
     def from_env(cls) -> "ImapConfig":
+        """Return the configuration parsed from the environment.
+
+        The result is cached for the process lifetime; call invalidate_cache()
+        to force the environment to be read again. Invalid configurations are
+        not cached.
+        """
+        global _cached_config
+        if _cached_config is None:
+            _cached_config = cls._read_env()
+        return _cached_config
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        global _cached_config
+        _cached_config = None
+
+    @classmethod
+    def _read_env(cls) -> "ImapConfig":
         logger.debug("Reading IMAP configuration from environment variables")
         host = (os.getenv("IMAP_HOST") or "").strip()
         username = (os.getenv("IMAP_USERNAME") or "").strip()
         password = os.getenv("IMAP_PASSWORD") or ""
-        logger.debug(f"IMAP_HOST={host}, IMAP_USERNAME={username}")
+        logger.debug("IMAP_HOST=%s, IMAP_USERNAME=%s", host, username)
 
-        port_raw = (os.getenv("IMAP_PORT") or "993").strip()
-        try:
-            port = int(port_raw)
-        except ValueError:
-            port = 993
+        port = _getenv_int("IMAP_PORT", 993)
 
         ssl = _getenv_bool("IMAP_SSL", True)
         starttls = _getenv_bool("IMAP_STARTTLS", False)
 
-        timeout_raw = (os.getenv("IMAP_TIMEOUT_SECONDS") or "30").strip()
-        try:
-            timeout_seconds = int(timeout_raw)
-        except ValueError:
-            timeout_seconds = 30
+        timeout_seconds = _getenv_int("IMAP_TIMEOUT_SECONDS", 30)
 
         if not host:
             logger.error("IMAP_HOST is not set or empty")
@@ -71,5 +100,5 @@ class ImapConfig:
             starttls=starttls,
             timeout_seconds=timeout_seconds,
         )
-        logger.debug(f"Config created: host={host}, port={port}, ssl={ssl}, starttls={starttls}")
+        logger.debug("Config created: host=%s, port=%s, ssl=%s, starttls=%s", host, port, ssl, starttls)
         return config
@@ -1,25 +1,49 @@
 from __future__ import annotations
 
+import atexit
+import base64
+import binascii
+import codecs
 import logging
-from contextlib import contextmanager
-from datetime import date, datetime
+import re
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass, field
+from datetime import date
 from email import policy
 from email.header import decode_header
 from email.message import Message
-from email.parser import BytesParser
-from typing import Any, Iterator
+from email.parser import BytesHeaderParser, BytesParser
+from email.policy import Policy
+from email.utils import collapse_rfc2231_value, unquote
+from functools import lru_cache
+from itertools import islice
+from typing import Any
+from urllib.parse import unquote_to_bytes
 
 from imapclient import IMAPClient
+from imapclient.exceptions import IMAPClientAbortError, IMAPClientError
 
 from .config import ImapConfig
 
 logger = logging.getLogger(__name__)
 
 
-@contextmanager
-def imap_connect(config: ImapConfig) -> Iterator[IMAPClient]:
+# Pooled connections idle for longer than this are reconnected instead of probed;
+# providers such as iCloud drop idle sessions after roughly 30 minutes.
+IDLE_THRESHOLD_SECONDS = 25 * 60
+# Connections used more recently than this are handed out without a NOOP probe,
+# so back-to-back tool calls pay no extra round trip.
+PROBE_AFTER_SECONDS = 60
+
+
+def _imap_open(config: ImapConfig) -> IMAPClient:
+    """Connect, negotiate TLS and log in. Used when the pool has no live client."""
+
     # IMAPClient uses socket default timeout unless passed; this sets a per-connection timeout.
-    logger.debug(f"Creating IMAPClient connection to {config.host}:{config.port} (ssl={config.ssl})")
+    logger.debug("Creating IMAPClient connection to %s:%s (ssl=%s)", config.host, config.port, config.ssl)
     try:
         client = IMAPClient(
             config.host,
@@ -30,34 +54,260 @@ def imap_connect(config: ImapConfig) -> Iterator[IMAPClient]:
         )
         logger.debug("IMAPClient instance created")
     except Exception as e:
-        logger.error(f"Failed to create IMAPClient: {e}", exc_info=True)
+        logger.error("Failed to create IMAPClient: %s", e, exc_info=True)
         raise
-    
+
     try:
-        if (not config.ssl) and config.starttls:
+        if config.use_starttls:
             logger.debug("Starting TLS...")
             client.starttls()
             logger.debug("TLS started successfully")
-        
-        logger.debug(f"Logging in as {config.username}...")
+
+        logger.debug("Logging in as %s...", config.username)
         client.login(config.username, config.password)
-        logger.info(f"Successfully logged in to IMAP server as {config.username}")
-        
-        yield client
-    except Exception as e:
-        logger.error(f"Error during IMAP operation: {e}", exc_info=True)
+        logger.info("Successfully logged in to IMAP server as %s", config.username)
+    except Exception:
+        _logout_quietly(client)
         raise
+    return client
+
+
+def _logout_quietly(client: IMAPClient) -> None:
+    try:
+        logger.debug("Logging out from IMAP server...")
+        client.logout()
+        logger.debug("Logged out successfully")
+    except Exception as e:
+        logger.warning("Error during logout: %s", e)
+
+
+def _close_quietly(client: IMAPClient) -> None:
+    # For connections already known to be dead or broken: close the socket
+    # without LOGOUT, which would block waiting for a BYE that never comes.
+    try:
+        client.shutdown()
+    except Exception as e:
+        logger.debug("Error closing IMAP connection: %s", e)
+
+
+@dataclass
+class _PoolEntry:
+    client: IMAPClient | None = None
+    last_used: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ImapClientPool:
+    """Process-wide cache of logged-in IMAPClient connections.
+
+    Connections are keyed by (host, port, username) and handed out one borrower
+    at a time, so back-to-back tool calls skip the TLS handshake and LOGIN.
+    """
+
+    def __init__(
+        self,
+        idle_threshold_seconds: float = IDLE_THRESHOLD_SECONDS,
+        probe_after_seconds: float = PROBE_AFTER_SECONDS,
+    ) -> None:
+        self.idle_threshold_seconds = idle_threshold_seconds
+        self.probe_after_seconds = probe_after_seconds
+        self._entries: dict[tuple[str, int, str], _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, config: ImapConfig) -> _PoolEntry:
+        key = (config.host, config.port, config.username)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PoolEntry()
+            return entry
+
+    def _is_alive(self, entry: _PoolEntry) -> bool:
+        idle = time.monotonic() - entry.last_used
+        if idle < self.probe_after_seconds:
+            return True
+        if idle >= self.idle_threshold_seconds:
+            logger.debug("Pooled IMAP connection idle too long; reconnecting")
+            return False
+        try:
+            entry.client.noop()
+        except (IMAPClientError, OSError) as e:
+            logger.debug("Pooled IMAP connection failed liveness probe: %s", e)
+            return False
+        return True
+
+    @contextmanager
+    def checkout(self, config: ImapConfig) -> Iterator[IMAPClient]:
+        entry = self._entry(config)
+        with entry.lock:
+            if entry.client is not None and not self._is_alive(entry):
+                _close_quietly(entry.client)
+                entry.client = None
+            if entry.client is None:
+                entry.client = _imap_open(config)
+            client = entry.client
+
+            try:
+                yield client
+            except (IMAPClientAbortError, OSError) as e:
+                # The connection is in an unknown state; drop it so the next
+                # borrower reconnects.
+                logger.error("Error during IMAP operation: %s", e, exc_info=True)
+                entry.client = None
+                _close_quietly(client)
+                raise
+            except Exception as e:
+                logger.error("Error during IMAP operation: %s", e, exc_info=True)
+                raise
+            finally:
+                entry.last_used = time.monotonic()
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            with entry.lock:
+                if entry.client is not None:
+                    _logout_quietly(entry.client)
+                    entry.client = None
+
+
+_pool = ImapClientPool()
+atexit.register(_pool.close_all)
+
+
+def imap_borrow(config: ImapConfig) -> AbstractContextManager[IMAPClient]:
+    """Borrow a logged-in IMAPClient from the process-wide pool."""
+    return _pool.checkout(config)
+
+
+# Older name for imap_borrow.
+imap_connect = imap_borrow
+
+
+# UIDs per FETCH command. Some servers reject long UID sets with
+# "parse error: maximum request size exceeded", so batches are capped.
+DEFAULT_FETCH_BATCH_SIZE = 100
+MAX_FETCH_BATCH_SIZE = 500
+
+
+def fetch_messages_bulk(
+    client: IMAPClient,
+    uids: Iterable[int],
+    parts: Sequence[str],
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+) -> Iterator[tuple[int, dict[Any, Any]]]:
+    """Fetch data items for many messages with one FETCH per batch of UIDs.
+
+    Yields (uid, data) pairs in request order; UIDs the server did not return
+    are skipped. Ask for several items at once (e.g. ENVELOPE, RFC822.SIZE and
+    BODY.PEEK[]) to get envelope and body in a single round trip.
+    """
+
+    batch_size = max(1, min(batch_size, MAX_FETCH_BATCH_SIZE))
+    it = iter(uids)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        logger.debug("Fetching %s for %s messages", parts, len(batch))
+        fetched = client.fetch(batch, parts)
+        for uid in batch:
+            data = fetched.get(uid)
+            if data is not None:
+                yield uid, data
+
+
+# RFC 2177: servers may drop a client that stays in IDLE for 30 minutes.
+IDLE_RENEW_SECONDS = 29 * 60
+
+# Upper bound for one idle_wait_for_new call; each call holds its own login.
+MAX_IDLE_WAIT_SECONDS = 30 * 60
+
+# How often the IDLE loop wakes up to notice a stop request.
+IDLE_POLL_SECONDS = 1.0
+
+
+def idle_wait_for_new(
+    config: ImapConfig,
+    mailbox: str,
+    timeout_seconds: float,
+    stop: threading.Event | None = None,
+) -> list[int]:
+    """Block in IMAP IDLE until new messages arrive in mailbox or the timeout passes.
+
+    Returns the UIDs of messages added since the call started (ascending), or
+    an empty list on timeout or once stop is set. The timeout is capped at
+    MAX_IDLE_WAIT_SECONDS. IDLE pins its connection for the whole wait, so
+    this opens a dedicated one rather than borrowing from the pool.
+    """
+
+    if stop is None:
+        stop = threading.Event()
+    timeout_seconds = min(timeout_seconds, MAX_IDLE_WAIT_SECONDS)
+
+    client = _imap_open(config)
+    try:
+        info = client.select_folder(mailbox, readonly=True)
+        uidnext = info.get(b"UIDNEXT")
+        if not uidnext:
+            uidnext = max(client.search(["ALL"]), default=0) + 1
+
+        deadline = time.monotonic() + timeout_seconds
+        # An EXISTS sent between SELECT and IDLE is buffered by IMAPClient and
+        # never reaches idle_check, so the first IDLE cycle lasts one poll
+        # slice and is always followed by a search.
+        cycle_end = min(deadline, time.monotonic() + IDLE_POLL_SECONDS)
+        while True:
+            _idle_until_exists(client, cycle_end, stop)
+            if stop.is_set():
+                return []
+            uids = _uids_since(client, uidnext)
+            if uids or time.monotonic() >= deadline:
+                return uids
+            cycle_end = deadline
     finally:
+        _logout_quietly(client)
+
+
+def _uids_since(client: IMAPClient, uidnext: int) -> list[int]:
+    # "n:*" always matches the highest UID, even when it is below n.
+    return sorted(uid for uid in client.search(["UID", f"{uidnext}:*"]) if uid >= uidnext)
+
+
+def _idle_until_exists(client: IMAPClient, deadline: float, stop: threading.Event) -> bool:
+    # Stay in IDLE until the server reports EXISTS, the deadline passes or
+    # stop is set, re-issuing IDLE before the server's inactivity cutoff.
+    while not stop.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        renew_at = time.monotonic() + min(remaining, IDLE_RENEW_SECONDS)
+        logger.debug("Entering IDLE for up to %.0f seconds", renew_at - time.monotonic())
+        client.idle()
+        found = False
         try:
-            logger.debug("Logging out from IMAP server...")
-            client.logout()
-            logger.debug("Logged out successfully")
-        except Exception as e:
-            logger.warning(f"Error during logout: {e}")
+            while not (found or stop.is_set()) and (wait := renew_at - time.monotonic()) > 0:
+                found = _has_exists(client.idle_check(timeout=min(wait, IDLE_POLL_SECONDS)))
+        finally:
+            # DONE may flush responses that arrived after the last check.
+            _, responses = client.idle_done()
+        if found or _has_exists(responses):
+            return True
+    return False
+
+
+def _has_exists(responses: list[tuple[Any, ...]]) -> bool:
+    return any(len(response) > 1 and response[1] == b"EXISTS" for response in responses)
 
 
 def parse_yyyy_mm_dd(value: str) -> date:
-    return datetime.strptime(value, "%Y-%m-%d").date()
+    # date.fromisoformat is implemented in C, but on Python 3.11+ it also
+    # accepts forms like "20240102" or "2024-W01-1"; insist on YYYY-MM-DD.
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        raise ValueError(f"Invalid date {value!r}; expected YYYY-MM-DD")
+    return date.fromisoformat(value)
 
 
 def _decode_mime_words(value: Any) -> str:
@@ -66,39 +316,124 @@ def _decode_mime_words(value: Any) -> str:
     if isinstance(value, str):
         return value
     if isinstance(value, bytes):
-        # Could be raw encoded-word bytes
-        try:
-            value = value.decode("utf-8", errors="replace")
-        except Exception:
-            value = repr(value)
+        return _decode_mime_bytes(value)
+    return _decode_header_value(value)
+
+
+# Envelope subjects and addresses repeat heavily across a mailbox scan
+# (mailing lists, notifications), so decoded values are memoized.
+@lru_cache(maxsize=4096)
+def _decode_mime_bytes(value: bytes) -> str:
+    # Could be raw encoded-word bytes
+    return _decode_header_value(value.decode("utf-8", errors="replace"))
+
+
+def _decode_header_value(value: Any) -> str:
+    # Accepts str or email.header.Header; the latter is what compat32 returns
+    # for headers carrying raw 8-bit bytes.
+    if isinstance(value, str):
+        if "=?" not in value:
+            # RFC 2047 encoded words always start with "=?"; nothing to decode.
+            return value
+        return _decode_encoded_words(value)
 
     parts: list[str] = []
     for chunk, encoding in decode_header(value):
         if isinstance(chunk, bytes):
-            enc = encoding or "utf-8"
-            parts.append(chunk.decode(enc, errors="replace"))
+            parts.append(_decode_charset(chunk, encoding or "utf-8"))
         else:
             parts.append(str(chunk))
     return "".join(parts)
 
 
+_ENCODED_WORD_RE = re.compile(r"=\?([^?]+)\?([BbQq])\?([^?]*)\?=")
+
+
+def _decode_charset(data: bytes, charset: str) -> str:
+    try:
+        return data.decode(charset, errors="replace")
+    except LookupError:
+        return data.decode("utf-8", errors="replace")
+
+
+def _decode_encoded_words(value: str) -> str:
+    """Decode RFC 2047 encoded words embedded in a header string.
+
+    Whitespace between two adjacent encoded words is dropped, as the RFC
+    requires; malformed encoded words are kept verbatim.
+    """
+
+    parts: list[str] = []
+    pos = 0
+    after_word = False
+    for m in _ENCODED_WORD_RE.finditer(value):
+        literal = value[pos : m.start()]
+        if not (after_word and (not literal or literal.isspace())):
+            parts.append(literal)
+
+        charset, encoding, data = m.groups()
+        try:
+            if encoding in "Bb":
+                raw = base64.b64decode(data + "=" * (-len(data) % 4))
+            else:
+                raw = binascii.a2b_qp(data, header=True)
+        except (binascii.Error, ValueError):
+            parts.append(m.group(0))
+            after_word = False
+        else:
+            # RFC 2231 allows a language suffix: "utf-8*en".
+            parts.append(_decode_charset(raw, charset.split("*", 1)[0]))
+            after_word = True
+        pos = m.end()
+
+    parts.append(value[pos:])
+    return "".join(parts)
+
+
+# Same unfolding policy.default applies on header fetch: drop CR/LF, keep
+# the folding whitespace that follows them.
+_LINESEP_RE = re.compile(r"\n|\r")
+
+
+def _unfold(value: str) -> str:
+    if "\n" in value or "\r" in value:
+        return "".join(_LINESEP_RE.split(value))
+    return value
+
+
+def header_to_str(msg: Message, name: str) -> str:
+    """Return a header of a parsed message as text, unfolded and with RFC 2047 encoded words decoded."""
+    value = msg.get(name)
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return _decode_header_value(_unfold(value))
+    return _unfold(_decode_header_value(value))
+
+
+_bytes_decode = bytes.decode
+
+
 def _format_address(addr: Any) -> str:
-    # IMAPClient returns EnvelopeAddress objects which have .name and .mailbox/.host
+    # IMAPClient returns Address dataclasses with fixed name/route/mailbox/host fields.
     if addr is None:
         return ""
-    name = getattr(addr, "name", None)
-    mailbox = getattr(addr, "mailbox", None)
-    host = getattr(addr, "host", None)
+    return _format_address_parts(addr.name, addr.mailbox, addr.host)
+
+
+def _address_text(value: Any) -> str:
+    if type(value) is bytes:
+        return _bytes_decode(value, "utf-8", "replace")
+    return str(value)
 
+
+@lru_cache(maxsize=4096)
+def _format_address_parts(name: Any, mailbox: Any, host: Any) -> str:
     email_addr = ""
     if mailbox and host:
-        mb = mailbox.decode() if isinstance(mailbox, (bytes, bytearray)) else str(mailbox)
-        hs = host.decode() if isinstance(host, (bytes, bytearray)) else str(host)
-        email_addr = f"{mb}@{hs}"
+        email_addr = f"{_address_text(mailbox)}@{_address_text(host)}"
 
-    display = ""
-    if name:
-        display = name.decode(errors="replace") if isinstance(name, (bytes, bytearray)) else str(name)
+    display = _address_text(name) if name else ""
 
     if display and email_addr:
         return f"{display} <{email_addr}>"
@@ -115,18 +450,218 @@ def envelope_to_dict(envelope: Any) -> dict[str, Any]:
             return []
         return [_format_address(a) for a in value]
 
+    # IMAPClient's Envelope always defines every field (possibly as None).
     d: dict[str, Any] = {}
-    d["date"] = envelope.date.isoformat() if getattr(envelope, "date", None) else None
-    d["subject"] = _decode_mime_words(getattr(envelope, "subject", None))
-    d["from"] = _addr_list(getattr(envelope, "from_", None))
-    d["to"] = _addr_list(getattr(envelope, "to", None))
-    d["cc"] = _addr_list(getattr(envelope, "cc", None))
-    d["message_id"] = _decode_mime_words(getattr(envelope, "message_id", None))
+    d["date"] = envelope.date.isoformat() if envelope.date is not None else None
+    d["subject"] = _decode_mime_words(envelope.subject)
+    d["from"] = _addr_list(envelope.from_)
+    d["to"] = _addr_list(envelope.to)
+    d["cc"] = _addr_list(envelope.cc)
+    d["message_id"] = _decode_mime_words(envelope.message_id)
     return d
 
 
-def parse_rfc822(message_bytes: bytes) -> Message:
-    return BytesParser(policy=policy.default).parsebytes(message_bytes)
+# Parsers hold no per-message state, so one instance per policy is shared.
+_POLICY_COMPAT = policy.compat32
+_POLICY_DEFAULT = policy.default
+_BYTES_PARSER_COMPAT = BytesParser(policy=_POLICY_COMPAT)
+_BYTES_PARSER_DEFAULT = BytesParser(policy=_POLICY_DEFAULT)
+_BYTES_HEADER_PARSER = BytesHeaderParser(policy=_POLICY_COMPAT)
+
+
+def parse_rfc822(message_bytes: bytes | bytearray, *, policy: Policy = policy.compat32) -> Message:
+    """Parse a raw RFC822 message.
+
+    The compat32 policy leaves headers as raw strings instead of building
+    structured header objects, which is all the helpers in this module need.
+    Pass policy=email.policy.default for RFC 5322 structured headers.
+    bytearray input is parsed in place, without copying it to bytes first.
+    """
+
+    if policy is _POLICY_COMPAT:
+        return _BYTES_PARSER_COMPAT.parsebytes(message_bytes)
+    if policy is _POLICY_DEFAULT:
+        return _BYTES_PARSER_DEFAULT.parsebytes(message_bytes)
+    return BytesParser(policy=policy).parsebytes(message_bytes)
+
+
+_PARAM_RE = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+
+def _disp_and_filename(part: Message) -> tuple[str, str | None]:
+    """Return (disposition, filename) from a single read of Content-Disposition.
+
+    Equivalent to get_content_disposition() and get_filename() without going
+    through the generic header parameter parser twice. The filename still
+    has RFC 2047 encoded words in it; see _part_filename.
+    """
+
+    raw = part.get("Content-Disposition")
+    if raw is not None and not isinstance(raw, str):
+        # email.header.Header for raw 8-bit values; leave those to the stdlib.
+        return (part.get_content_disposition() or "", part.get_filename())
+
+    disposition = ""
+    filename: str | None = None
+    if raw:
+        disposition = raw.split(";", 1)[0].strip().lower()
+        # First occurrence wins, as with the stdlib's get_param().
+        params: dict[str, str] = {}
+        for m in _PARAM_RE.finditer(raw):
+            params.setdefault(m.group(1).lower(), m.group(2).strip())
+        if "filename*0" in params or "filename*0*" in params:
+            # RFC 2231 continuations are rare enough to hand to the stdlib.
+            return disposition, part.get_filename()
+        # The stdlib lists RFC 2231 parameters after plain ones, so a plain
+        # filename= takes precedence over filename*= when both are present.
+        if "filename" in params:
+            filename = unquote(params["filename"])
+        elif "filename*" in params:
+            filename = _decode_rfc2231_param(unquote(params["filename*"]))
+
+    if filename is None:
+        content_type = part.get("Content-Type")
+        if content_type is not None and "name" in str(content_type).lower():
+            filename = part.get_param("name")
+            if filename is not None:
+                filename = collapse_rfc2231_value(filename)
+    return disposition, filename.strip() if filename is not None else None
+
+
+def _decode_rfc2231_param(value: str) -> str:
+    # charset'language'percent-encoded-value
+    parts = value.split("'", 2)
+    if len(parts) != 3:
+        return value
+    charset, _language, encoded = parts
+    data = unquote_to_bytes(encoded)
+    return _decode_charset(data, charset or "us-ascii")
+
+
+def parse_rfc822_headers(message_bytes: bytes | bytearray) -> Message:
+    """Parse only the header block of a raw RFC822 message.
+
+    The body is cut off at the first blank line before parsing, so large
+    bodies and attachments are never decoded. Also accepts a bare header block
+    such as a BODY[HEADER] fetch result.
+    """
+
+    ends = [i for i in (message_bytes.find(b"\r\n\r\n"), message_bytes.find(b"\n\n")) if i >= 0]
+    head = message_bytes[: min(ends)] if ends else message_bytes
+    return _BYTES_HEADER_PARSER.parsebytes(head)
+
+
+def _part_filename(part: Message) -> str | None:
+    filename = _disp_and_filename(part)[1]
+    if not filename:
+        return filename
+    return _decode_header_value(filename)
+
+
+def _transfer_encoding(part: Message) -> str:
+    return str(part.get("Content-Transfer-Encoding", "")).strip().lower()
+
+
+_WHITESPACE = dict.fromkeys(map(ord, " \t\r\n"))
+
+
+def _base64_padding(encoded: str) -> int | None:
+    # Number of trailing "=" pads, ignoring whitespace. None when a pad shows
+    # up anywhere but the end (e.g. "QQ==QkI="): the stdlib decoder stops at
+    # such a pad, so sizes computed from the length would be wrong.
+    pad_at = encoded.find("=")
+    if pad_at == -1:
+        return 0
+    rest = encoded[pad_at:].translate(_WHITESPACE)
+    if len(rest) > 2 or rest.strip("="):
+        return None
+    return len(rest)
+
+
+def _base64_decoded_size(encoded: str) -> int | None:
+    """Return the decoded size of a base64 payload without decoding it.
+
+    Returns None when the payload is not well-formed enough to tell.
+    """
+
+    length = len(encoded)
+    for ws in "\r\n\t ":
+        length -= encoded.count(ws)
+    if length % 4:
+        return None
+    padding = _base64_padding(encoded)
+    if padding is None:
+        return None
+    return length * 3 // 4 - padding
+
+
+def _payload_size(part: Message) -> int:
+    if _transfer_encoding(part) == "base64":
+        raw = part.get_payload()
+        if isinstance(raw, str):
+            size = _base64_decoded_size(raw)
+            if size is not None:
+                return size
+    return len(part.get_payload(decode=True) or b"")
+
+
+def _read_base64_range(part: Message, offset: int, max_bytes: int) -> tuple[int, bytes] | None:
+    """Decode only the bytes [offset, offset + max_bytes) of a base64 part.
+
+    Every 4 base64 characters encode 3 bytes, so the covering range of
+    4-character groups is decoded and trimmed. Returns (decoded_size, chunk),
+    or None when the part is not base64 or is malformed.
+    """
+
+    if _transfer_encoding(part) != "base64":
+        return None
+    raw = part.get_payload()
+    if not isinstance(raw, str):
+        return None
+
+    encoded = raw.translate(_WHITESPACE)
+    padding = _base64_padding(encoded)
+    if len(encoded) % 4 or padding is None:
+        return None
+    size = len(encoded) // 4 * 3 - padding
+    if offset > size:
+        return size, b""
+
+    end = size if max_bytes <= 0 else min(size, offset + max_bytes)
+    first_group = offset // 3
+    last_group = -(-end // 3)
+    try:
+        chunk = base64.b64decode(encoded[first_group * 4 : last_group * 4], validate=True)
+    except binascii.Error:
+        return None
+    skip = offset - first_group * 3
+    return size, chunk[skip : skip + end - offset]
+
+
+def _part_text(part: Message, max_chars: int = 0) -> str:
+    """Decode a text part with its declared charset.
+
+    With max_chars > 0, a prefix of 4 bytes per wanted character is decoded
+    first; if that yields more than max_chars characters it is returned and
+    the caller does the final truncation. Otherwise (e.g. stateful codecs
+    such as UTF-7, which hold back whole runs) the full payload is decoded.
+    """
+
+    payload = part.get_payload(decode=True) or b""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        decoder_factory = codecs.getincrementaldecoder(charset)
+    except LookupError:
+        decoder_factory = codecs.getincrementaldecoder("utf-8")
+
+    limit = (max_chars + 1) * 4
+    if max_chars > 0 and len(payload) > limit:
+        # Not final: a multi-byte sequence split at the cut is held back
+        # instead of turning into a replacement character.
+        text = decoder_factory(errors="replace").decode(payload[:limit])
+        if len(text) > max_chars:
+            return text
+    return decoder_factory(errors="replace").decode(payload, final=True)
 
 
 def iter_attachment_parts(msg: Message) -> Iterator[Message]:
@@ -136,8 +671,7 @@ def iter_attachment_parts(msg: Message) -> Iterator[Message]:
     """
 
     for part in msg.walk():
-        filename = part.get_filename()
-        if filename:
+        if _disp_and_filename(part)[1]:
             yield part
 
 
@@ -161,51 +695,54 @@ def get_attachment_bytes(
     This is intended to support chunked downloads over JSON transports.
     """
 
-    parts = list(iter_attachment_parts(msg))
-    if not parts:
-        raise ValueError("Message has no attachments")
-
     selected_part: Message | None = None
     selected_index: int | None = None
-
-    if filename is not None:
-        for i, part in enumerate(parts):
-            if part.get_filename() == filename:
-                selected_part = part
-                selected_index = i
+    count = 0
+
+    # Walk lazily and stop at the first match instead of collecting every part.
+    for i, part in enumerate(iter_attachment_parts(msg)):
+        count = i + 1
+        if filename is not None:
+            if _part_filename(part) == filename:
+                selected_part, selected_index = part, i
                 break
-        if selected_part is None:
+        elif i == attachment_index:
+            selected_part, selected_index = part, i
+            break
+
+    if selected_part is None:
+        if not count:
+            raise ValueError("Message has no attachments")
+        if filename is not None:
             raise ValueError(f"No attachment found with filename {filename!r}")
-    else:
-        if attachment_index < 0 or attachment_index >= len(parts):
-            raise ValueError(
-                f"attachment_index out of range: {attachment_index} (have {len(parts)} attachments)"
-            )
-        selected_index = attachment_index
-        selected_part = parts[attachment_index]
-
-    payload_all = selected_part.get_payload(decode=True) or b""
-    original_size = len(payload_all)
+        raise ValueError(
+            f"attachment_index out of range: {attachment_index} (have {count} attachments)"
+        )
 
     if offset_bytes < 0:
         raise ValueError("offset_bytes must be >= 0")
+
+    window = _read_base64_range(selected_part, offset_bytes, max_bytes)
+    if window is not None:
+        original_size, payload = window
+    else:
+        payload_all = selected_part.get_payload(decode=True) or b""
+        original_size = len(payload_all)
+        payload = payload_all[offset_bytes:]
+        if max_bytes and max_bytes > 0:
+            payload = payload[:max_bytes]
+
     if offset_bytes > original_size:
         raise ValueError(
             f"offset_bytes out of range: {offset_bytes} (attachment size is {original_size})"
         )
 
-    payload = payload_all[offset_bytes:]
-
-    truncated = False
-    if max_bytes and max_bytes > 0 and len(payload) > max_bytes:
-        payload = payload[:max_bytes]
-        truncated = True
-
+    truncated = offset_bytes + len(payload) < original_size
     next_offset = offset_bytes + len(payload)
 
     return {
         "index": int(selected_index or 0),
-        "filename": selected_part.get_filename(),
+        "filename": _part_filename(selected_part),
         "content_type": selected_part.get_content_type(),
         "size_bytes": int(original_size),
         "offset_bytes": int(offset_bytes),
@@ -222,39 +759,33 @@ def extract_bodies(msg: Message, max_chars: int = 20000) -> dict[str, str]:
     html = ""
 
     if msg.is_multipart():
-        for part in msg.walk():
-            ctype = part.get_content_type()
-            disp = (part.get_content_disposition() or "").lower()
-            if disp in {"attachment", "inline"} and part.get_filename():
+        # Depth-first over the MIME tree, children pushed in reverse so parts
+        # are visited in walk() order. Attached messages (message/rfc822) and
+        # containers marked as attachments are not descended into.
+        stack: list[Message] = list(reversed(msg.get_payload()))
+        while stack and not (text and html):
+            part = stack.pop()
+            maintype = part.get_content_maintype()
+            disp, part_filename = _disp_and_filename(part)
+            if maintype == "message":
+                continue
+            if part.is_multipart():
+                if disp != "attachment":
+                    stack.extend(reversed(part.get_payload()))
+                continue
+            if disp in {"attachment", "inline"} and part_filename:
                 continue
+            ctype = part.get_content_type()
             if ctype == "text/plain" and not text:
-                try:
-                    text = part.get_content() or ""
-                except Exception:
-                    payload = part.get_payload(decode=True) or b""
-                    text = payload.decode("utf-8", errors="replace")
-            if ctype == "text/html" and not html:
-                try:
-                    html = part.get_content() or ""
-                except Exception:
-                    payload = part.get_payload(decode=True) or b""
-                    html = payload.decode("utf-8", errors="replace")
-            if text and html:
-                break
+                text = _part_text(part, max_chars)
+            elif ctype == "text/html" and not html:
+                html = _part_text(part, max_chars)
     else:
         ctype = msg.get_content_type()
         if ctype == "text/plain":
-            try:
-                text = msg.get_content() or ""
-            except Exception:
-                payload = msg.get_payload(decode=True) or b""
-                text = payload.decode("utf-8", errors="replace")
+            text = _part_text(msg, max_chars)
         elif ctype == "text/html":
-            try:
-                html = msg.get_content() or ""
-            except Exception:
-                payload = msg.get_payload(decode=True) or b""
-                html = payload.decode("utf-8", errors="replace")
+            html = _part_text(msg, max_chars)
 
     if max_chars > 0:
         if text and len(text) > max_chars:
@@ -269,13 +800,11 @@ def list_attachments(msg: Message) -> list[dict[str, Any]]:
     out: list[dict[str, Any]] = []
 
     for part in iter_attachment_parts(msg):
-        ctype = part.get_content_type()
-        payload = part.get_payload(decode=True) or b""
         out.append(
             {
-                "filename": part.get_filename(),
-                "content_type": ctype,
-                "size_bytes": len(payload),
+                "filename": _part_filename(part),
+                "content_type": part.get_content_type(),
+                "size_bytes": _payload_size(part),
             }
         )
 
@@ -2,64 +2,88 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
 from typing import Any, Optional
 
+import anyio
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request as StarletteRequest
 from starlette.responses import Response as StarletteResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .config import ImapConfig
 from .imap import (
+    DEFAULT_FETCH_BATCH_SIZE,
+    MAX_IDLE_WAIT_SECONDS,
     envelope_to_dict,
     extract_bodies,
+    fetch_messages_bulk,
     get_attachment_bytes,
-    imap_connect,
+    header_to_str,
+    idle_wait_for_new,
+    imap_borrow,
     list_attachments,
     parse_rfc822,
+    parse_rfc822_headers,
     parse_yyyy_mm_dd,
 )
 
 load_dotenv()  # loads .env if present; no-op otherwise
 
-# Set up logging
+
+def _env(name: str, default: str = "") -> str:
+    # Unset or empty variables fall back to the default; values are stripped.
+    return (os.getenv(name) or default).strip()
+
+
+# Set up logging; LOG_LEVEL accepts the standard level names (default INFO).
+_LOG_LEVEL = logging.getLevelName(_env("LOG_LEVEL", "INFO").upper())
+if not isinstance(_LOG_LEVEL, int):
+    _LOG_LEVEL = logging.INFO
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=_LOG_LEVEL,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-# Enable uvicorn access logging
+# Keep uvicorn's access/error logs at the same level
 uvicorn_logger = logging.getLogger("uvicorn.access")
-uvicorn_logger.setLevel(logging.DEBUG)
+uvicorn_logger.setLevel(_LOG_LEVEL)
 uvicorn_error_logger = logging.getLogger("uvicorn.error")
-uvicorn_error_logger.setLevel(logging.DEBUG)
+uvicorn_error_logger.setLevel(_LOG_LEVEL)
 
 
 def _getenv_int(name: str, default: int) -> int:
-    raw = os.getenv(name)
-    if raw is None:
+    raw = _env(name)
+    if not raw:
         return default
     try:
-        return int(raw.strip())
+        return int(raw)
     except ValueError:
         return default
 
 
 # Transport defaults are chosen for "standalone server on another machine" usage.
 # If you want the old local stdio behavior, run with MCP_TRANSPORT=stdio.
-_MCP_HOST = (os.getenv("MCP_HOST") or "127.0.0.1").strip()
+_MCP_HOST = _env("MCP_HOST", "127.0.0.1")
 _MCP_PORT = _getenv_int("MCP_PORT", 8993)
+_TRANSPORT = _env("MCP_TRANSPORT", "streamable-http").lower().replace("_", "-")
+if _TRANSPORT not in {"stdio", "sse", "streamable-http"}:
+    raise ValueError(
+        "MCP_TRANSPORT must be one of: stdio, sse, streamable-http (got %r)" % _TRANSPORT
+    )
+# mount_path is only relevant for the SSE transport; safe to pass None otherwise.
+_MOUNT_PATH = _env("MCP_MOUNT_PATH") or None
 
-logger.info(f"Initializing FastMCP server with host={_MCP_HOST}, port={_MCP_PORT}")
+logger.info("Initializing FastMCP server with host=%s, port=%s", _MCP_HOST, _MCP_PORT)
 
 # Disable DNS rebinding protection for non-localhost addresses
 # For production, you should configure proper allowed_hosts/origins
 from mcp.server.transport_security import TransportSecuritySettings
 transport_security = None
 if _MCP_HOST not in ("127.0.0.1", "localhost", "::1"):
-    logger.info(f"Disabling DNS rebinding protection for non-localhost address {_MCP_HOST}")
+    logger.info("Disabling DNS rebinding protection for non-localhost address %s", _MCP_HOST)
     transport_security = TransportSecuritySettings(
         enable_dns_rebinding_protection=False
     )
@@ -83,36 +107,106 @@ async def health_check(request: StarletteRequest) -> StarletteResponse:
     return JSONResponse({"status": "ok", "server": "IMAP Email"})
 
 
-# Add logging middleware
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: StarletteRequest, call_next):
-        logger.info(f"Incoming request: {request.method} {request.url.path}")
-        logger.debug(f"Headers: {dict(request.headers)}")
-        logger.debug(f"Query params: {dict(request.query_params)}")
-        
-        response = await call_next(request)
-        
-        logger.info(f"Response status: {response.status_code}")
-        return response
+# Request logging as a plain ASGI wrapper: no per-request task group or
+# stream bridging, unlike BaseHTTPMiddleware.
+def log_middleware(app: ASGIApp) -> ASGIApp:
+    async def _mw(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+
+        logger.info("Incoming request: %s %s", scope["method"], scope["path"])
+        logger.debug("ASGI scope: %s", scope)
+
+        # Log the body as it is received
+        async def logged_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and logger.isEnabledFor(logging.DEBUG):
+                body = message.get("body", b"")
+                if body:
+                    try:
+                        logger.debug("Request body: %s", body.decode('utf-8')[:500])
+                    except UnicodeDecodeError:
+                        logger.debug("Request body (binary): %s bytes", len(body))
+            return message
+
+        async def logged_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                logger.info("Response status: %s", message["status"])
+            await send(message)
+
+        await app(scope, logged_receive, logged_send)
+
+    return _mw
+
+
+# Patch the streamable HTTP app to add detailed logging. Only worth the
+# per-request wrapper (and body decode) when DEBUG records are emitted.
+if _TRANSPORT == "streamable-http" and logger.isEnabledFor(logging.DEBUG):
+    _original_streamable_http_app = mcp.streamable_http_app
+
+    def _logged_streamable_http_app() -> ASGIApp:
+        return log_middleware(_original_streamable_http_app())
+
+    mcp.streamable_http_app = _logged_streamable_http_app
+
 
 _CONFIG: Optional[ImapConfig] = None
 
 
-def get_config() -> ImapConfig:
+def _load_config() -> ImapConfig:
     global _CONFIG
-    if _CONFIG is None:
-        logger.debug("Loading IMAP configuration from environment")
-        _CONFIG = ImapConfig.from_env()
-        logger.info(f"IMAP configuration loaded: host={_CONFIG.host}, port={_CONFIG.port}, username={_CONFIG.username}")
+    logger.debug("Loading IMAP configuration from environment")
+    _CONFIG = ImapConfig.from_env()
+    logger.info("IMAP configuration loaded: host=%s, port=%s, username=%s", _CONFIG.host, _CONFIG.port, _CONFIG.username)
     return _CONFIG
 
 
-def _normalize_fetch_item(item: dict[str, Any], key: str) -> Any:
-    # IMAPClient sometimes returns byte keys depending on server; handle both.
-    if key in item:
-        return item[key]
-    bkey = key.encode("ascii")
-    return item.get(bkey)
+# Load eagerly so tool calls only pay a global read; if the environment is
+# incomplete at import, get_config() retries (and raises) on first use.
+try:
+    _load_config()
+except ValueError as e:
+    logger.warning("IMAP configuration not loaded at startup (%s); will retry on first tool call", e)
+
+
+def get_config() -> ImapConfig:
+    cfg = _CONFIG
+    if cfg is not None:
+        return cfg
+    return _load_config()
+
+
+# FETCH data item names as IMAPClient normally returns them (bytes keys).
+_FETCH_KEYS = {
+    key: key.encode("ascii")
+    for key in ("ENVELOPE", "FLAGS", "RFC822", "RFC822.SIZE", "INTERNALDATE", "BODY[]", "BODY[HEADER]")
+}
+
+
+def _normalize_fetch_item(item: dict[Any, Any], key: str) -> Any:
+    # IMAPClient sometimes returns byte keys depending on server; handle both,
+    # trying the usual bytes key first so the common case is a single lookup.
+    value = item.get(_FETCH_KEYS.get(key) or key.encode("ascii"))
+    if value is None:
+        value = item.get(key)
+    return value
+
+
+_bytes_decode = bytes.decode
+
+
+def _decode_flags(flags: Any) -> list[str]:
+    # A single response carries flags of one type, so pick the conversion once
+    # per list rather than per flag. Flag atoms are ASCII per RFC 3501.
+    if not flags:
+        return []
+    first = flags[0]
+    if isinstance(first, bytes):
+        return [_bytes_decode(f, "ascii", "replace") for f in flags]
+    if isinstance(first, bytearray):
+        return [f.decode("ascii", "replace") for f in flags]
+    return [str(f) for f in flags]
 
 
 @mcp.tool()
@@ -120,11 +214,11 @@ def list_mailboxes() -> list[dict[str, Any]]:
     """List available mailboxes/folders."""
     logger.info("list_mailboxes tool called")
     cfg = get_config()
-    logger.debug(f"Connecting to IMAP server at {cfg.host}:{cfg.port}")
-    with imap_connect(cfg) as client:
+    logger.debug("Connecting to IMAP server at %s:%s", cfg.host, cfg.port)
+    with imap_borrow(cfg) as client:
         logger.debug("Successfully connected to IMAP server")
         folders = client.list_folders()
-        logger.debug(f"Retrieved {len(folders)} folders")
+        logger.debug("Retrieved %s folders", len(folders))
 
     out: list[dict[str, Any]] = []
     for flags, delimiter, name in folders:
@@ -132,10 +226,10 @@ def list_mailboxes() -> list[dict[str, Any]]:
             {
                 "name": name,
                 "delimiter": delimiter,
-                "flags": [f.decode() if isinstance(f, (bytes, bytearray)) else str(f) for f in flags],
+                "flags": _decode_flags(flags),
             }
         )
-    logger.info(f"Returning {len(out)} mailboxes")
+    logger.info("Returning %s mailboxes", len(out))
     return out
 
 
@@ -174,7 +268,7 @@ def search_messages(
     if not criteria:
         criteria = ["ALL"]
 
-    with imap_connect(cfg) as client:
+    with imap_borrow(cfg) as client:
         client.select_folder(mailbox, readonly=True)
         uids = client.search(criteria)
 
@@ -185,13 +279,16 @@ def search_messages(
         if limit and limit > 0:
             uids = uids[-limit:]
 
-        fetched = client.fetch(uids, ["ENVELOPE", "FLAGS", "RFC822.SIZE", "INTERNALDATE"])
+        # Batched so large limits stay under servers' request-size caps. Pairs
+        # come back in UID order, so no per-UID lookup is needed afterwards.
+        fetched = list(
+            fetch_messages_bulk(client, uids, ["ENVELOPE", "FLAGS", "RFC822.SIZE", "INTERNALDATE"])
+        )
 
     out: list[dict[str, Any]] = []
-    for uid in uids:
-        item = fetched.get(uid, {})
+    for uid, item in fetched:
         env = _normalize_fetch_item(item, "ENVELOPE")
-        flags = _normalize_fetch_item(item, "FLAGS") or []
+        flags = _normalize_fetch_item(item, "FLAGS")
         size = _normalize_fetch_item(item, "RFC822.SIZE")
         internaldate = _normalize_fetch_item(item, "INTERNALDATE")
 
@@ -200,12 +297,9 @@ def search_messages(
                 "uid": int(uid),
                 "mailbox": mailbox,
                 "envelope": envelope_to_dict(env),
-                "flags": [
-                    f.decode() if isinstance(f, (bytes, bytearray)) else str(f)
-                    for f in (flags or [])
-                ],
+                "flags": _decode_flags(flags),
                 "size_bytes": int(size) if size is not None else None,
-                "internaldate": internaldate.isoformat() if hasattr(internaldate, "isoformat") else None,
+                "internaldate": internaldate.isoformat() if internaldate is not None else None,
             }
         )
 
@@ -213,40 +307,72 @@ def search_messages(
 
 
 @mcp.tool()
-def get_message(
-    uid: int,
-    mailbox: str = "INBOX",
-    include_body: bool = True,
-    include_html: bool = False,
-    max_body_chars: int = 20000,
-) -> dict[str, Any]:
-    """Fetch a message by UID. Returns headers and (optionally) the body."""
+async def idle_watch(mailbox: str = "INBOX", timeout_s: int = 1500) -> dict[str, Any]:
+    """Wait for new messages in a mailbox using IMAP IDLE instead of polling.
+
+    Returns as soon as new messages arrive, with one {"uid", "event": "EXISTS"}
+    entry per new message, or with no events once timeout_s seconds pass
+    (capped at 1800). Call it again to keep watching.
+    """
+    if timeout_s <= 0:
+        raise ValueError("timeout_s must be a positive number of seconds")
+
     cfg = get_config()
+    # IDLE blocks its connection; run it off the event loop. If this call is
+    # cancelled, stop makes the worker leave IDLE and log out promptly
+    # instead of holding its connection until the timeout.
+    stop = threading.Event()
+    try:
+        uids = await anyio.to_thread.run_sync(
+            idle_wait_for_new,
+            cfg,
+            mailbox,
+            min(timeout_s, MAX_IDLE_WAIT_SECONDS),
+            stop,
+            abandon_on_cancel=True,
+        )
+    finally:
+        stop.set()
 
-    with imap_connect(cfg) as client:
-        client.select_folder(mailbox, readonly=True)
-        fetched = client.fetch([uid], ["RFC822", "FLAGS", "RFC822.SIZE", "INTERNALDATE"])
+    return {
+        "mailbox": mailbox,
+        "events": [{"uid": int(uid), "event": "EXISTS"} for uid in uids],
+        "timed_out": not uids,
+    }
 
-    item = fetched.get(uid)
-    if not item:
-        raise ValueError(f"No message found for UID {uid} in {mailbox}")
 
-    raw_msg = _normalize_fetch_item(item, "RFC822")
+def _build_message_dict(
+    uid: int,
+    item: dict[Any, Any],
+    mailbox: str,
+    include_body: bool,
+    include_html: bool,
+    max_body_chars: int,
+    include_attachments: bool = True,
+) -> dict[str, Any]:
+    # Without body or attachments only the header block was fetched (see
+    # _message_fetch_parts); skip the MIME parse for it.
+    if include_body or include_attachments:
+        raw_msg = _normalize_fetch_item(item, "BODY[]")
+        parse = parse_rfc822
+    else:
+        raw_msg = _normalize_fetch_item(item, "BODY[HEADER]")
+        parse = parse_rfc822_headers
     if not isinstance(raw_msg, (bytes, bytearray)):
         raise ValueError("Server did not return RFC822 bytes for message")
 
-    msg = parse_rfc822(bytes(raw_msg))
+    msg = parse(raw_msg)
 
     headers = {
-        "subject": str(msg.get("subject", "")),
-        "from": str(msg.get("from", "")),
-        "to": str(msg.get("to", "")),
-        "cc": str(msg.get("cc", "")),
-        "date": str(msg.get("date", "")),
-        "message_id": str(msg.get("message-id", "")),
+        "subject": header_to_str(msg, "subject"),
+        "from": header_to_str(msg, "from"),
+        "to": header_to_str(msg, "to"),
+        "cc": header_to_str(msg, "cc"),
+        "date": header_to_str(msg, "date"),
+        "message_id": header_to_str(msg, "message-id"),
     }
 
-    flags = _normalize_fetch_item(item, "FLAGS") or []
+    flags = _normalize_fetch_item(item, "FLAGS")
     size = _normalize_fetch_item(item, "RFC822.SIZE")
     internaldate = _normalize_fetch_item(item, "INTERNALDATE")
 
@@ -258,13 +384,10 @@ def get_message(
         "uid": int(uid),
         "mailbox": mailbox,
         "headers": headers,
-        "flags": [
-            f.decode() if isinstance(f, (bytes, bytearray)) else str(f)
-            for f in (flags or [])
-        ],
+        "flags": _decode_flags(flags),
         "size_bytes": int(size) if size is not None else None,
-        "internaldate": internaldate.isoformat() if hasattr(internaldate, "isoformat") else None,
-        "attachments": list_attachments(msg),
+        "internaldate": internaldate.isoformat() if internaldate is not None else None,
+        "attachments": list_attachments(msg) if include_attachments else [],
     }
 
     if include_body:
@@ -275,6 +398,88 @@ def get_message(
     return result
 
 
+# BODY.PEEK[] returns the same bytes as RFC822 without setting \Seen.
+_MESSAGE_FETCH_PARTS = ["BODY.PEEK[]", "FLAGS", "RFC822.SIZE", "INTERNALDATE"]
+_HEADER_FETCH_PARTS = ["BODY.PEEK[HEADER]", "FLAGS", "RFC822.SIZE", "INTERNALDATE"]
+
+
+def _message_fetch_parts(include_body: bool, include_attachments: bool) -> list[str]:
+    return _MESSAGE_FETCH_PARTS if include_body or include_attachments else _HEADER_FETCH_PARTS
+
+
+@mcp.tool()
+def get_message(
+    uid: int,
+    mailbox: str = "INBOX",
+    include_body: bool = True,
+    include_html: bool = False,
+    max_body_chars: int = 20000,
+    include_attachments: bool = True,
+) -> dict[str, Any]:
+    """Fetch a message by UID. Returns headers and (optionally) the body and attachment metadata."""
+    cfg = get_config()
+
+    with imap_borrow(cfg) as client:
+        client.select_folder(mailbox, readonly=True)
+        fetched = client.fetch([uid], _message_fetch_parts(include_body, include_attachments))
+
+    item = fetched.get(uid)
+    if not item:
+        raise ValueError(f"No message found for UID {uid} in {mailbox}")
+
+    return _build_message_dict(
+        uid, item, mailbox, include_body, include_html, max_body_chars, include_attachments
+    )
+
+
+@mcp.tool()
+def get_messages(
+    uids: list[int],
+    mailbox: str = "INBOX",
+    include_body: bool = True,
+    include_html: bool = False,
+    max_body_chars: int = 20000,
+    include_attachments: bool = True,
+    batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+) -> dict[str, Any]:
+    """Fetch up to 100 messages by UID in as few round trips as possible.
+
+    Messages are fetched with one FETCH per batch of batch_size UIDs instead
+    of one per message. Each entry in "messages" has the same shape as a
+    get_message result; UIDs the server did not return are listed in
+    "missing_uids".
+    """
+    if not uids:
+        raise ValueError("Provide at least one UID")
+
+    # De-duplicate while preserving order to avoid fetching a message twice.
+    uid_list = list(dict.fromkeys(int(uid) for uid in uids))
+    if len(uid_list) > 100:
+        raise ValueError("At most 100 unique UIDs can be fetched per call")
+    if any(uid <= 0 for uid in uid_list):
+        raise ValueError("All UIDs must be positive integers")
+
+    cfg = get_config()
+    with imap_borrow(cfg) as client:
+        client.select_folder(mailbox, readonly=True)
+        parts = _message_fetch_parts(include_body, include_attachments)
+        fetched = dict(fetch_messages_bulk(client, uid_list, parts, batch_size))
+
+    messages = [
+        _build_message_dict(
+            uid, fetched[uid], mailbox, include_body, include_html, max_body_chars, include_attachments
+        )
+        for uid in uid_list
+        if uid in fetched
+    ]
+
+    return {
+        "mailbox": mailbox,
+        "messages": messages,
+        "missing_uids": [uid for uid in uid_list if uid not in fetched],
+    }
+
+
 @mcp.tool()
 def download_attachment(
     uid: int,
@@ -302,19 +507,19 @@ def download_attachment(
 
     cfg = get_config()
 
-    with imap_connect(cfg) as client:
+    with imap_borrow(cfg) as client:
         client.select_folder(mailbox, readonly=True)
-        fetched = client.fetch([uid], ["RFC822", "RFC822.SIZE", "INTERNALDATE"])
+        fetched = client.fetch([uid], ["BODY.PEEK[]", "RFC822.SIZE", "INTERNALDATE"])
 
     item = fetched.get(uid)
     if not item:
         raise ValueError(f"No message found for UID {uid} in {mailbox}")
 
-    raw_msg = _normalize_fetch_item(item, "RFC822")
+    raw_msg = _normalize_fetch_item(item, "BODY[]")
     if not isinstance(raw_msg, (bytes, bytearray)):
         raise ValueError("Server did not return RFC822 bytes for message")
 
-    msg = parse_rfc822(bytes(raw_msg))
+    msg = parse_rfc822(raw_msg)
 
     att = get_attachment_bytes(
         msg,
@@ -334,7 +539,7 @@ def download_attachment(
         "uid": int(uid),
         "mailbox": mailbox,
         "message_size_bytes": int(size) if size is not None else None,
-        "message_internaldate": internaldate.isoformat() if hasattr(internaldate, "isoformat") else None,
+        "message_internaldate": internaldate.isoformat() if internaldate is not None else None,
         "attachment": {
             **att,
             "sha256": hashlib.sha256(content_bytes).hexdigest(),
@@ -343,29 +548,32 @@ def download_attachment(
     }
 
 
+def _flags_after_store(client: Any, uids: list[int], stored: dict[int, Any] | None) -> dict[int, Any]:
+    # STORE (without .SILENT) already answers with the updated FLAGS, so only
+    # UIDs missing from that response need a separate FETCH round trip.
+    flags = {uid: stored[uid] for uid in uids if stored and uid in stored}
+    missing = [uid for uid in uids if uid not in flags]
+    if missing:
+        fetched = client.fetch(missing, ["FLAGS"])
+        for uid in missing:
+            flags[uid] = _normalize_fetch_item(fetched.get(uid, {}), "FLAGS")
+    return flags
+
+
 @mcp.tool()
 def set_seen(uid: int, mailbox: str = "INBOX", seen: bool = True) -> dict[str, Any]:
     """Mark a message as seen/unseen."""
     cfg = get_config()
 
-    with imap_connect(cfg) as client:
+    with imap_borrow(cfg) as client:
         client.select_folder(mailbox, readonly=False)
-        if seen:
-            client.add_flags([uid], ["\\Seen"])
-        else:
-            client.remove_flags([uid], ["\\Seen"])
-        fetched = client.fetch([uid], ["FLAGS"])
-
-    item = fetched.get(uid, {})
-    flags = _normalize_fetch_item(item, "FLAGS") or []
+        store = client.add_flags if seen else client.remove_flags
+        flags = _flags_after_store(client, [uid], store([uid], ["\\Seen"]))[uid]
 
     return {
         "uid": int(uid),
         "mailbox": mailbox,
-        "flags": [
-            f.decode() if isinstance(f, (bytes, bytearray)) else str(f)
-            for f in (flags or [])
-        ],
+        "flags": _decode_flags(flags),
     }
 
 @mcp.tool()
@@ -386,22 +594,17 @@ def mark_deleted(uids: list[int], mailbox: str = "INBOX") -> dict[str, Any]:
         raise ValueError("All UIDs must be positive integers")
 
     cfg = get_config()
-    with imap_connect(cfg) as client:
+    with imap_borrow(cfg) as client:
         client.select_folder(mailbox, readonly=False)
-        client.add_flags(uid_list, ["\\Deleted"])
-        fetched = client.fetch(uid_list, ["FLAGS"])
+        updated = _flags_after_store(client, uid_list, client.add_flags(uid_list, ["\\Deleted"]))
 
     messages: list[dict[str, Any]] = []
     for uid in uid_list:
-        item = fetched.get(uid, {})
-        flags = _normalize_fetch_item(item, "FLAGS") or []
+        flags = updated[uid]
         messages.append(
             {
                 "uid": int(uid),
-                "flags": [
-                    f.decode() if isinstance(f, (bytes, bytearray)) else str(f)
-                    for f in (flags or [])
-                ],
+                "flags": _decode_flags(flags),
             }
         )
 
@@ -415,60 +618,10 @@ def mark_deleted(uids: list[int], mailbox: str = "INBOX") -> dict[str, Any]:
 
 def main() -> None:
     logger.info("Starting MCP IMAP server...")
-    
-    # Patch the streamable HTTP app to add detailed logging
-    if (os.getenv("MCP_TRANSPORT") or "streamable-http").strip().lower() in ("streamable-http", "streamable_http"):
-        original_streamable_http_app = mcp.streamable_http_app
-        
-        def logged_streamable_http_app():
-            app = original_streamable_http_app()
-            
-            # Wrap the ASGI app to log requests
-            original_call = app.__call__
-            
-            async def logged_call(scope, receive, send):
-                if scope["type"] == "http":
-                    logger.info(f"ASGI HTTP request: {scope['method']} {scope['path']}")
-                    logger.debug(f"ASGI scope: {scope}")
-                    
-                    # Read and log the body
-                    body_parts = []
-                    async def logged_receive():
-                        message = await receive()
-                        if message["type"] == "http.request":
-                            body = message.get("body", b"")
-                            if body:
-                                body_parts.append(body)
-                                try:
-                                    logger.debug(f"Request body: {body.decode('utf-8')[:500]}")
-                                except:
-                                    logger.debug(f"Request body (binary): {len(body)} bytes")
-                        return message
-                    
-                    return await original_call(scope, logged_receive, send)
-                return await original_call(scope, receive, send)
-            
-            app.__call__ = logged_call
-            return app
-        
-        mcp.streamable_http_app = logged_streamable_http_app
-    
-    transport = (os.getenv("MCP_TRANSPORT") or "streamable-http").strip().lower()
-    if transport == "streamable_http":
-        transport = "streamable-http"
-    
-    logger.info(f"Using transport: {transport}")
-
-    if transport not in {"stdio", "sse", "streamable-http"}:
-        raise ValueError(
-            "MCP_TRANSPORT must be one of: stdio, sse, streamable-http (got %r)" % transport
-        )
+    logger.info("Using transport: %s", _TRANSPORT)
+    logger.info("Mount path: %s", _MOUNT_PATH)
+    logger.info("Server will listen on %s:%s", _MCP_HOST, _MCP_PORT)
 
-    # mount_path is only relevant for the SSE transport; safe to pass None otherwise.
-    mount_path = (os.getenv("MCP_MOUNT_PATH") or "").strip() or None
-    logger.info(f"Mount path: {mount_path}")
-    logger.info(f"Server will listen on {_MCP_HOST}:{_MCP_PORT}")
-    
     logger.info("Calling mcp.run()...")
-    mcp.run(transport=transport, mount_path=mount_path)
+    mcp.run(transport=_TRANSPORT, mount_path=_MOUNT_PATH)
     logger.info("mcp.run() returned")